@@ -3,12 +3,16 @@ import streamlit.components.v1 as components
 import pandas as pd
 from local_loader import LocalLoader
 import difflib
-import Levenshtein
 import os
-import importlib
-import local_loader
+import json
 from learning_manager import LearningManager
 from memo_manager import MemoManager
+from scoring import normalize_text, normalize_answer, compute_similarity, compute_clause_scores
+from corpus_watcher import CorpusWatcher
+from prefetcher import SectionPrefetcher
+from structure_grader import StructureGrader
+from bundle_exporter import export_bundle
+from similar_items import load_confusables, item_key
 from datetime import datetime
 
 # Page Config
@@ -25,6 +29,15 @@ if 'data' not in st.session_state:
     st.session_state.data = None
 if 'debug_info' not in st.session_state:
     st.session_state.debug_info = None
+if 'keyword_matcher' not in st.session_state:
+    st.session_state.keyword_matcher = None
+if 'search_index' not in st.session_state:
+    st.session_state.search_index = None
+if 'corpus_version' not in st.session_state:
+    st.session_state.corpus_version = None
+if 'confusables' not in st.session_state:
+    # Generated offline by `python similar_items.py`
+    st.session_state.confusables = load_confusables()
 if 'focus_target_idx' not in st.session_state:
     st.session_state.focus_target_idx = None
 if 'last_action_time' not in st.session_state:
@@ -60,28 +73,19 @@ st.session_state.last_action_time = current_time
 # Data Loading (Auto-load on startup handled below)
 # Sidebar removed as per user request.
 
-import unicodedata
+# Live input component (debounced text area that reports its value while typing)
+_live_input = components.declare_component(
+    "live_input",
+    path=os.path.join(os.path.dirname(os.path.abspath(__file__)), "components", "live_input")
+)
 
 # Helper Functions
-def normalize_text(text):
-    if not text:
-        return ""
-    # NFKC normalization converts full-width numbers/parens to half-width
-    text = unicodedata.normalize('NFKC', text)
-    # Remove spaces (full-width and half-width) to ignore stylistic differences in spacing
-    return text.replace(" ", "").replace("　", "")
-
-def compute_similarity(text1, text2):
-    if not text1 or not text2:
-        return 0.0
-    # Normalize both texts before comparison
-    text1_norm = normalize_text(text1)
-    text2_norm = normalize_text(text2)
-    return Levenshtein.ratio(text1_norm, text2_norm) * 100
+def live_text_area(label, value, key, height=150, debounce_ms=300):
+    return _live_input(label=label, value=value, height=height, debounce_ms=debounce_ms, key=key, default=value)
 
 def generate_diff_html(correct, actual):
     # Normalize for diff generation too, so purely stylistic diffs don't show up
-    correct_norm = normalize_text(correct)
+    correct_norm = normalize_answer(correct)
     actual_norm = normalize_text(actual)
     
     d = difflib.Differ()
@@ -107,41 +111,87 @@ def generate_diff_html(correct, actual):
     html.append("</div>")
     return "".join(html)
 
+def generate_clause_html(clause_result, threshold=80):
+    # 正解の項目ごとに一致率を表示し、欠落・不十分な項目を強調する
+    html = []
+    html.append("<div style='line-height: 1.5;'>")
+    for clause in clause_result["clauses"]:
+        text = clause["correct"].replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+        if clause["score"] >= threshold:
+            style = "color: #333;"
+        else:
+            style = "background-color: #fee2e2; color: #991b1b; font-weight: bold;"
+        html.append(f"<div style='{style} padding: 2px 4px;'>[{clause['score']:.0f}%] {text}</div>")
+    html.append("</div>")
+    return "".join(html)
+
+def open_item(h1, h2, title):
+    # 検索結果などから論点を直接開く（h1/h2 クエリパラメータのディープリンクと同じ状態にする）
+    st.session_state.selected_h1 = h1
+    st.session_state.selected_h2 = h2
+    st.session_state.h2_select_box = h2
+    st.session_state.step = 'step2_writing'
+    st.query_params["h1"] = h1
+    st.query_params["h2"] = h2
+    titles = [item['title'] for item in st.session_state.data[h1][h2]]
+    st.session_state.focus_target_idx = titles.index(title) if title in titles else None
+
 def reset_to_selection():
     st.session_state.step = 'selection'
     st.session_state.selected_h1 = None
     st.session_state.selected_h2 = None
     st.query_params.clear()
 
+@st.cache_resource
+def get_corpus_watcher():
+    # Shared by all sessions. Edits in data/ are reparsed per file in the background.
+    watcher = CorpusWatcher(LocalLoader())
+    watcher.start()
+    return watcher
+
+@st.cache_resource
+def get_prefetcher():
+    return SectionPrefetcher(MemoManager())
+
+def sync_corpus(watcher):
+    version, data, debug_info, keyword_matcher = watcher.snapshot()
+    st.session_state.data = data
+    st.session_state.debug_info = debug_info
+    st.session_state.keyword_matcher = keyword_matcher
+    st.session_state.search_index = watcher.loader.search_index
+    st.session_state.corpus_version = version
+
 # Main Logic
 if st.session_state.data is None:
     # Auto-load on first run
     try:
-        importlib.reload(local_loader)
-        from local_loader import LocalLoader
-        loader = LocalLoader()
-        ret = loader.load_data()
-        if isinstance(ret, tuple):
-            st.session_state.data, st.session_state.debug_info = ret
-            
-            # Check query params for restoration AFTER data load
-            qp = st.query_params
-            if "h1" in qp:
-                h1_val = qp["h1"]
-                if h1_val in st.session_state.data:
-                    st.session_state.selected_h1 = h1_val
-                    st.session_state.step = 'step1_structure'
-                    
-                    if "h2" in qp:
-                        h2_val = qp["h2"]
-                        if h2_val in st.session_state.data[h1_val]:
-                            st.session_state.selected_h2 = h2_val
-                            st.session_state.step = 'step2_writing'
-            st.rerun()
+        sync_corpus(get_corpus_watcher())
+        
+        # Check query params for restoration AFTER data load
+        qp = st.query_params
+        if "h1" in qp:
+            h1_val = qp["h1"]
+            if h1_val in st.session_state.data:
+                st.session_state.selected_h1 = h1_val
+                st.session_state.step = 'step1_structure'
+                
+                if "h2" in qp:
+                    h2_val = qp["h2"]
+                    if h2_val in st.session_state.data[h1_val]:
+                        st.session_state.selected_h2 = h2_val
+                        st.session_state.step = 'step2_writing'
+        st.rerun()
     except Exception as e:
         st.error(f"データ読み込みエラー: {e}")
 
 else:
+    # Pick up content edited since the last rerun
+    watcher = get_corpus_watcher()
+    if watcher.version != st.session_state.corpus_version:
+        sync_corpus(watcher)
+        if st.session_state.step != 'selection' and st.session_state.selected_h1 not in st.session_state.data:
+            reset_to_selection()
+    
     data = st.session_state.data
     
     # Global Stealth Mode Toggle & CSS
@@ -225,6 +275,22 @@ else:
                     ```
                     """)
         else:
+            # Full-text search over titles and answers
+            query = st.text_input("論点を検索", key="search_query", placeholder="例: 欠損金")
+            if query and st.session_state.search_index:
+                results = st.session_state.search_index.search(query)
+                if not results:
+                    st.caption("該当する論点がありません。")
+                for r_idx, result in enumerate(results):
+                    st.button(
+                        f"{result['h1']} > {result['h2']} > {result['title']}",
+                        key=f"search_result_{r_idx}",
+                        help=result['snippet'],
+                        on_click=open_item,
+                        args=(result['h1'], result['h2'], result['title'])
+                    )
+                st.divider()
+            
             selected_h1 = st.selectbox("学習するテーマを選択してください", h1_options)
             
             if st.button("このテーマで開始", type="primary"):
@@ -232,6 +298,34 @@ else:
                 st.session_state.step = 'step1_structure'
                 st.query_params["h1"] = selected_h1
                 st.rerun()
+            
+            # Offline study: a self-contained HTML file that scores in the browser
+            with st.expander("オフライン学習"):
+                st.caption("選択中のテーマを1つのHTMLファイルに書き出します。採点と差分表示はブラウザ内で行われ、学習中の通信は発生しません。")
+                if st.button("書き出しファイルを作成"):
+                    st.session_state.offline_bundle = (selected_h1, export_bundle(selected_h1, data[selected_h1], memo_manager))
+                bundle = st.session_state.get("offline_bundle")
+                if bundle and bundle[0] == selected_h1:
+                    st.download_button("ダウンロード", data=bundle[1], file_name=f"{selected_h1}.html", mime="text/html")
+                
+                # Re-importing the same results file only adds time and scores not imported yet
+                uploaded = st.file_uploader("オフライン学習の結果を取り込む", type="json")
+                if uploaded is not None:
+                    # Import once per attached file; reruns while it stays attached show the same outcome
+                    if st.session_state.get("offline_import_file_id") != uploaded.file_id:
+                        try:
+                            added, results = learning_manager.import_offline_results(json.load(uploaded))
+                            st.session_state.offline_import_result = (added, results, None)
+                        except Exception as e:
+                            st.session_state.offline_import_result = (0, [], str(e))
+                        st.session_state.offline_import_file_id = uploaded.file_id
+                    added, results, error = st.session_state.offline_import_result
+                    if error:
+                        st.error(f"取り込みエラー: {error}")
+                    else:
+                        st.success(f"学習時間 {learning_manager.format_time(added)}・採点結果 {len(results)}件を取り込みました。")
+                        if results:
+                            st.dataframe(pd.DataFrame(results), hide_index=True)
 
     # --- Screen 2: Step 1 Structure Recall ---
     elif st.session_state.step == 'step1_structure':
@@ -242,8 +336,29 @@ else:
         st.markdown("### 構成想起")
         st.info("このテーマに含まれる構造を思い浮かべて記述してください。")
         
-        # New text area for recall output (non-judged)
-        st.text_area("構成のアウトプット（メモ用）:", height=200, placeholder="ここに思い出した構成を書き出してみてください。")
+        # Text area for recall output, graded against the H2/H3 tree on demand
+        outline_text = st.text_area("構成のアウトプット（メモ用）:", height=200, key=f"structure_recall_{h1}", placeholder="ここに思い出した構成を書き出してみてください。1行に1項目ずつ書くと判定できます。")
+        
+        if st.button("構成を判定", disabled=not outline_text.strip()):
+            result = StructureGrader(data[h1]).grade(outline_text)
+            col_s1, col_s2, col_s3 = st.columns(3)
+            col_s1.metric("再現率", f"{result['recall'] * 100:.0f}%")
+            col_s2.metric("適合率", f"{result['precision'] * 100:.0f}%")
+            col_s3.metric("順序の誤り", f"{len(result['order_errors'])}件")
+            
+            if result['missing']:
+                with st.expander(f"書き出せなかった項目（{len(result['missing'])}件）"):
+                    for entry in result['missing']:
+                        indent = "" if entry['level'] == 2 else "    "
+                        st.markdown(f"{indent}- {entry['title']}")
+            if result['order_errors']:
+                with st.expander("順序が前後している行"):
+                    for line, entry in result['order_errors']:
+                        st.markdown(f"- {line} → {entry['h2']} / {entry['title']}")
+            if result['unmatched_lines']:
+                with st.expander("どの項目にも対応しなかった行"):
+                    for line in result['unmatched_lines']:
+                        st.markdown(f"- {line}")
         
         # Hidden answer toggle
         if st.checkbox("正解（構成ツリー）を表示する"):
@@ -279,6 +394,9 @@ else:
             reset_to_selection()
             st.rerun()
         
+        # 入力中に一致率を逐次表示するモード（判定ボタンを押すまで採点は確定しない）
+        live_mode = st.toggle("入力中に一致率を表示", key="live_scoring_mode")
+        
         st.divider()
         
         h2_dict = data[h1]
@@ -318,8 +436,21 @@ else:
             
             items = h2_dict[selected_h2]
             
+            # Memos for this section (already loaded if it was prefetched), then warm up the next one
+            prefetcher = get_prefetcher()
+            section_memos = prefetcher.get_memos(st.session_state.corpus_version, h1, selected_h2, items)
+            if current_idx < len(h2_options) - 1:
+                next_h2 = h2_options[current_idx + 1]
+                prefetcher.prefetch(st.session_state.corpus_version, h1, next_h2, h2_dict[next_h2])
+            
             # Display input boxes for each H3 item
+            title_seen = {}
             for i, item in enumerate(items):
+                # Per-item state is keyed by title (plus occurrence for duplicate titles), not position,
+                # so answers stay on the same question when the content is hot-reloaded
+                title_seen[item['title']] = title_seen.get(item['title'], 0) + 1
+                item_id = item['title'] if title_seen[item['title']] == 1 else f"{item['title']}#{title_seen[item['title']]}"
+                
                 # Anchor for scrolling
                 st.markdown(f'<div id="quest_{i}"></div>', unsafe_allow_html=True)
                 
@@ -328,18 +459,32 @@ else:
                 with col_q1:
                     st.markdown(f"<h3>{i+1}. {stealth_class(item['title'])}</h3>", unsafe_allow_html=True)
                 with col_q2:
-                    current_memo = memo_manager.get_memo(h1, selected_h2, item['title'])
+                    current_memo = section_memos.get(item['title'], "")
                     with st.popover("📝 メモ"):
-                        memo_key = f"memo_input_{h1}_{selected_h2}_{i}"
+                        memo_key = f"memo_input_{h1}_{selected_h2}_{item_id}"
                         new_memo = st.text_area("メモ内容", value=current_memo, key=memo_key, height=150, label_visibility="collapsed")
                         if st.button("保存", key=f"memo_save_{i}"):
                             memo_manager.save_memo(h1, selected_h2, item['title'], new_memo)
+                            prefetcher.invalidate(h1, selected_h2)
                             st.success("保存しました。")
                 
+                # Links to near-duplicate items that students tend to mix up
+                confusable_items = st.session_state.confusables.get(item_key(h1, selected_h2, item['title']), [])
+                confusable_items = [c for c in confusable_items if c['h2'] in data.get(c['h1'], {})]
+                if confusable_items:
+                    with st.expander(f"⚠️ 紛らわしい論点（{len(confusable_items)}件）"):
+                        for c_idx, other in enumerate(confusable_items):
+                            st.button(
+                                f"{other['h1']} > {other['h2']} > {other['title']}（類似度 {other['similarity'] * 100:.0f}%）",
+                                key=f"confusable_{i}_{c_idx}",
+                                on_click=open_item,
+                                args=(other['h1'], other['h2'], other['title'])
+                            )
+                
                 # Unique keys for each item
-                input_key = f"input_{h1}_{selected_h2}_{i}"
-                stable_input_key = f"stable_input_{h1}_{selected_h2}_{i}" # Stable storage
-                judged_key = f"judged_{h1}_{selected_h2}_{i}"
+                input_key = f"input_{h1}_{selected_h2}_{item_id}"
+                stable_input_key = f"stable_input_{h1}_{selected_h2}_{item_id}" # Stable storage
+                judged_key = f"judged_{h1}_{selected_h2}_{item_id}"
                 
                 # Initialize state
                 if judged_key not in st.session_state:
@@ -350,15 +495,26 @@ else:
                     # Use a placeholder in session state if not there to avoid key errors
                     initial_val = st.session_state.get(stable_input_key, "")
                     
-                    # Wrap in form to prevent partial submissions/resets
-                    with st.form(key=f"form_{input_key}"):
-                        user_text = st.text_area("解答入力:", key=input_key, value=initial_val, height=150)
-                        submitted = st.form_submit_button("判定")
+                    if live_mode:
+                        live_text = live_text_area("解答入力:", value=initial_val, key=f"live_{input_key}")
+                        # Keep the draft in stable storage so switching modes does not drop it
+                        st.session_state[stable_input_key] = live_text
+                        st.metric("一致率（入力中）", f"{compute_similarity(live_text, item['answer']):.1f}%")
                         
-                        if submitted:
-                            st.session_state[stable_input_key] = user_text # Save to stable storage
+                        if st.button("判定", key=f"live_judge_{input_key}"):
+                            st.session_state[stable_input_key] = live_text
                             st.session_state[judged_key] = True
                             st.rerun()
+                    else:
+                        # Wrap in form to prevent partial submissions/resets
+                        with st.form(key=f"form_{input_key}"):
+                            user_text = st.text_area("解答入力:", key=input_key, value=initial_val, height=150)
+                            submitted = st.form_submit_button("判定")
+                            
+                            if submitted:
+                                st.session_state[stable_input_key] = user_text # Save to stable storage
+                                st.session_state[judged_key] = True
+                                st.rerun()
 
                     # Auto-focus logic after reset (kept outside form, relies on re-render)
                     if st.session_state.focus_target_idx == i:
@@ -392,12 +548,34 @@ else:
                     score = compute_similarity(current_input, correct_text)
                     st.metric("一致率", f"{score:.1f}%")
                     
+                    # Keyword coverage
+                    if item.get("keywords") and st.session_state.keyword_matcher:
+                        missing = st.session_state.keyword_matcher.missing_keywords(item, current_input)
+                        covered = len(item["keywords"]) - len(missing)
+                        if missing:
+                            st.markdown(f"**キーワード {covered}/{len(item['keywords'])}** 不足: " + "、".join(
+                                f"<span style='background-color: #fee2e2; color: #991b1b; font-weight: bold;'>{k}</span>" for k in missing
+                            ), unsafe_allow_html=True)
+                        else:
+                            st.markdown(f"**キーワード {covered}/{len(item['keywords'])}** すべて含まれています。")
+                    
                     # Result Display
                     if score < 100:
                         st.markdown("**差分確認:**")
                         st.markdown("凡例: <span style='background-color: #fee2e2; color: #991b1b; font-weight: bold;'>不足（赤）</span> / <span style='background-color: #dbeafe; color: #1e40af; text-decoration: line-through;'>余分（青）</span>", unsafe_allow_html=True)
                         st.markdown(generate_diff_html(correct_text, current_input), unsafe_allow_html=True)
                         
+                        # Clause alignment is far costlier than compute_similarity; reuse it until the input changes
+                        clause_key = f"clause_result_{h1}_{selected_h2}_{item_id}"
+                        cached_clause = st.session_state.get(clause_key)
+                        if cached_clause is None or cached_clause[0] != (current_input, correct_text):
+                            cached_clause = ((current_input, correct_text), compute_clause_scores(current_input, correct_text))
+                            st.session_state[clause_key] = cached_clause
+                        clause_result = cached_clause[1]
+                        if len(clause_result["clauses"]) > 1:
+                            with st.expander(f"項目ごとの一致率（合計 {clause_result['total']:.1f}%）"):
+                                st.markdown(generate_clause_html(clause_result), unsafe_allow_html=True)
+                        
                         with st.expander("正解の全文を確認"):
                             st.text(correct_text)
                     else:
@@ -0,0 +1,210 @@
+import html
+import json
+import uuid
+from datetime import datetime
+from scoring import normalize_answer
+
+# Single-file page: the corpus is embedded as JSON and scoring/diffing runs in the browser.
+# Scoring matches compute_similarity (Indel ratio = 2 * LCS / (len1 + len2)) on NFKC-normalised text.
+BUNDLE_TEMPLATE = """<!DOCTYPE html>
+<html lang="ja">
+<head>
+<meta charset="utf-8">
+<meta name="viewport" content="width=device-width, initial-scale=1">
+<title>__TITLE__</title>
+<style>
+  body { font-family: sans-serif; max-width: 960px; margin: 0 auto; padding: 16px; color: #333; }
+  textarea { box-sizing: border-box; width: 100%; height: 150px; font-size: 16px; padding: 8px; }
+  button { margin: 4px 4px 4px 0; padding: 6px 12px; }
+  .item { border-bottom: 1px solid #ddd; padding: 12px 0; }
+  .score { font-size: 24px; font-weight: 600; margin: 8px 0; }
+  .diff { font-family: monospace; white-space: pre-wrap; line-height: 1.5; background-color: #f8f9fa; padding: 10px; border-radius: 5px; border: 1px solid #ddd; }
+  .missing { background-color: #fee2e2; color: #991b1b; font-weight: bold; }
+  .extra { background-color: #dbeafe; color: #1e40af; text-decoration: line-through; }
+  .memo { background-color: #fffbe6; padding: 8px; white-space: pre-wrap; }
+</style>
+</head>
+<body>
+<h1>__TITLE__</h1>
+<p>
+  <select id="section"></select>
+  <button id="export">結果を書き出す</button>
+  <span id="study-time"></span>
+</p>
+<div id="items"></div>
+<script type="application/json" id="bundle-data">__BUNDLE_DATA__</script>
+<script>
+  var bundle = JSON.parse(document.getElementById("bundle-data").textContent);
+  var storageKey = "tax-law-bundle-" + bundle.bundle_id;
+  var state = JSON.parse(localStorage.getItem(storageKey) || '{"results": [], "seconds": {}, "inputs": {}}');
+  var lastAction = Date.now();
+
+  function save() { localStorage.setItem(storageKey, JSON.stringify(state)); }
+
+  function today() {
+    var d = new Date();
+    return d.getFullYear() + "-" + String(d.getMonth() + 1).padStart(2, "0") + "-" + String(d.getDate()).padStart(2, "0");
+  }
+
+  // Same rule as the app: count the interval since the last action unless it exceeds 30 minutes
+  function trackTime() {
+    var now = Date.now();
+    var elapsed = (now - lastAction) / 1000;
+    if (elapsed > 0 && elapsed < 1800) {
+      state.seconds[today()] = (state.seconds[today()] || 0) + elapsed;
+    }
+    lastAction = now;
+    save();
+    var total = state.seconds[today()] || 0;
+    document.getElementById("study-time").textContent = "今日の学習時間: " + Math.floor(total / 60) + "分" + Math.floor(total % 60) + "秒";
+  }
+
+  function normalize(text) {
+    return (text || "").normalize("NFKC").replace(/[ \\u3000]/g, "");
+  }
+
+  function escapeHtml(text) {
+    return text.replace(/&/g, "&amp;").replace(/</g, "&lt;").replace(/>/g, "&gt;").replace(/\\n/g, "<br>");
+  }
+
+  // LCS table for the diff; the score follows from its length
+  function lcsTable(a, b) {
+    var n = a.length, m = b.length;
+    var table = new Uint16Array((n + 1) * (m + 1));
+    for (var i = n - 1; i >= 0; i--) {
+      for (var j = m - 1; j >= 0; j--) {
+        table[i * (m + 1) + j] = a[i] === b[j]
+          ? table[(i + 1) * (m + 1) + j + 1] + 1
+          : Math.max(table[(i + 1) * (m + 1) + j], table[i * (m + 1) + j + 1]);
+      }
+    }
+    return table;
+  }
+
+  function grade(input, answerNorm) {
+    var actual = normalize(input);
+    if (!actual || !answerNorm) { return {score: 0, html: ""}; }
+    var n = actual.length, m = answerNorm.length;
+    var table = lcsTable(actual, answerNorm);
+    var score = table[0] * 2 / (n + m) * 100;
+
+    var out = [], i = 0, j = 0;
+    while (i < n || j < m) {
+      if (i < n && j < m && actual[i] === answerNorm[j]) {
+        out.push(escapeHtml(actual[i])); i++; j++;
+      } else if (j < m && (i >= n || table[i * (m + 1) + j + 1] >= table[(i + 1) * (m + 1) + j])) {
+        out.push('<span class="missing">' + escapeHtml(answerNorm[j]) + "</span>"); j++;
+      } else {
+        out.push('<span class="extra">' + escapeHtml(actual[i]) + "</span>"); i++;
+      }
+    }
+    return {score: score, html: out.join("")};
+  }
+
+  function render(sectionIdx) {
+    var section = bundle.sections[sectionIdx];
+    var container = document.getElementById("items");
+    container.innerHTML = "";
+    section.items.forEach(function (item, idx) {
+      var inputKey = section.h2 + "|" + item.title;
+      var div = document.createElement("div");
+      div.className = "item";
+      div.innerHTML = "<h3></h3><textarea></textarea><div>" +
+        '<button class="judge">判定</button><button class="reveal">正解を表示</button>' +
+        (item.memo ? '<button class="show-memo">メモ</button>' : "") +
+        '</div><div class="score"></div><div class="diff" hidden></div>' +
+        '<div class="answer diff" hidden></div><div class="memo" hidden></div>';
+      div.querySelector("h3").textContent = (idx + 1) + ". " + item.title;
+      var textarea = div.querySelector("textarea");
+      textarea.value = state.inputs[inputKey] || "";
+      textarea.addEventListener("input", function () {
+        state.inputs[inputKey] = textarea.value;
+        trackTime();
+      });
+      div.querySelector(".judge").addEventListener("click", function () {
+        var result = grade(textarea.value, item.answer_norm);
+        div.querySelector(".score").textContent = "一致率 " + result.score.toFixed(1) + "%";
+        var diff = div.querySelector(".diff");
+        diff.innerHTML = result.html;
+        diff.hidden = result.score >= 100;
+        state.results.push({h2: section.h2, title: item.title, score: Math.round(result.score * 10) / 10, judged_at: new Date().toISOString()});
+        trackTime();
+      });
+      div.querySelector(".reveal").addEventListener("click", function () {
+        var answer = div.querySelector(".answer");
+        answer.textContent = item.answer;
+        answer.hidden = !answer.hidden;
+      });
+      if (item.memo) {
+        div.querySelector(".show-memo").addEventListener("click", function () {
+          var memo = div.querySelector(".memo");
+          memo.textContent = item.memo;
+          memo.hidden = !memo.hidden;
+        });
+      }
+      container.appendChild(div);
+    });
+  }
+
+  var select = document.getElementById("section");
+  bundle.sections.forEach(function (section, idx) {
+    var option = document.createElement("option");
+    option.value = idx;
+    option.textContent = section.h2;
+    select.appendChild(option);
+  });
+  select.addEventListener("change", function () { render(Number(select.value)); trackTime(); });
+
+  document.getElementById("export").addEventListener("click", function () {
+    var payload = {
+      bundle_id: bundle.bundle_id,
+      h1: bundle.h1,
+      exported_at: new Date().toISOString(),
+      study_seconds: state.seconds,
+      results: state.results
+    };
+    var blob = new Blob([JSON.stringify(payload, null, 2)], {type: "application/json"});
+    var link = document.createElement("a");
+    link.href = URL.createObjectURL(blob);
+    link.download = "results_" + bundle.bundle_id + ".json";
+    link.click();
+  });
+
+  if (bundle.sections.length) { render(0); }
+</script>
+</body>
+</html>
+"""
+
+
+def export_bundle(h1, h2_dict, memo_manager):
+    """
+    テーマ（H1）の論点・正規化済み正解・メモを1つの HTML ファイルにまとめる。
+    採点と差分表示はブラウザ内で行うため、通信なしで学習できる。
+    学習結果は JSON で書き出し、LearningManager.import_offline_results で取り込む。
+    """
+    sections = []
+    for h2, items in h2_dict.items():
+        memos = memo_manager.get_memos(h1, h2, [item["title"] for item in items])
+        sections.append({
+            "h2": h2,
+            "items": [
+                {
+                    "title": item["title"],
+                    "answer": item["answer"],
+                    "answer_norm": normalize_answer(item["answer"]),
+                    "memo": memos.get(item["title"], "")
+                }
+                for item in items
+            ]
+        })
+
+    bundle = {
+        "bundle_id": uuid.uuid4().hex,
+        "h1": h1,
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "sections": sections
+    }
+    # "</" inside the embedded JSON would otherwise close the <script> element
+    bundle_json = json.dumps(bundle, ensure_ascii=False).replace("</", "<\\/")
+    return BUNDLE_TEMPLATE.replace("__TITLE__", html.escape(h1)).replace("__BUNDLE_DATA__", bundle_json)
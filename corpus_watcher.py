@@ -0,0 +1,88 @@
+import os
+import threading
+import logging
+from keyword_matcher import KeywordMatcher
+
+logger = logging.getLogger(__name__)
+
+
+class CorpusWatcher:
+    """
+    data/ 以下の .md ファイルをポーリングで監視し、変更されたファイルだけを
+    LocalLoader で再解析してコーパスに反映する。
+
+    全セッションで1つのインスタンスを共有し（app.py では st.cache_resource）、
+    内容が更新されるたびに version を上げる。各セッションは次の再実行時に
+    version を比較して新しいコーパスに切り替える。
+    """
+
+    def __init__(self, loader, interval=2.0):
+        self.loader = loader
+        self.interval = interval
+        self.version = 0
+        self.data = None
+        self.debug_info = None
+        self.keyword_matcher = None
+        self._mtimes = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """初回の全件読み込みを行い、監視スレッドを開始する"""
+        with self._lock:
+            self._mtimes = self._scan()
+            self._publish(*self.loader.load_data())
+        self._thread = threading.Thread(target=self._run, name="corpus-watcher", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def snapshot(self):
+        """(version, data, debug_info, keyword_matcher) を一貫した組で返す"""
+        with self._lock:
+            return self.version, self.data, self.debug_info, self.keyword_matcher
+
+    def _scan(self):
+        mtimes = {}
+        for file_path in self.loader.list_files():
+            try:
+                mtimes[file_path] = os.path.getmtime(file_path)
+            except OSError:
+                # Deleted between glob and stat; picked up as removed on this scan
+                pass
+        return mtimes
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.check_for_changes()
+            except Exception:
+                logger.exception("Failed to reload changed data files")
+
+    def check_for_changes(self):
+        """変更・追加・削除されたファイルだけを反映する。変更があれば True を返す"""
+        current = self._scan()
+        changed = [p for p, mtime in current.items() if self._mtimes.get(p) != mtime]
+        removed = [p for p in self._mtimes if p not in current]
+        if not changed and not removed:
+            return False
+
+        with self._lock:
+            for file_path in removed:
+                self.loader.remove_file(file_path)
+            for file_path in changed:
+                self.loader.update_file(file_path)
+            self._mtimes = current
+            self._publish(*self.loader.build_corpus())
+
+        logger.info(f"Reloaded {len(changed)} changed / {len(removed)} removed file(s), version {self.version}")
+        return True
+
+    def _publish(self, data, debug_info):
+        self.data = data
+        self.debug_info = debug_info
+        # The keyword automaton is built once per corpus version
+        self.keyword_matcher = KeywordMatcher.from_corpus(data)
+        self.version += 1
@@ -0,0 +1,132 @@
+import re
+from collections import deque
+from scoring import normalize_text
+
+# Runs of kanji such as 内国法人 / 収益事業 / 退職年金業務等 are taken as statutory terms.
+# Conjunctions written in kanji (又・及・並・若) split runs instead of joining them.
+KEYWORD_PATTERN = re.compile(r"(?:(?![又及並若])[一-鿿々]){3,12}")
+# Runs cut off after a number ("3年以内" -> 年以内, "1億円以下" -> 億円以下) are not terms
+UNIT_PREFIXES = tuple("円万億年月日")
+# Relational suffixes are stripped so that 資本等取引以外 yields 資本等取引
+RELATIONAL_SUFFIXES = re.compile(r"(?:以後|以前|以内|以上|以下|未満|以外|超)$")
+# Generic compounds that appear throughout the corpus without naming a statutory concept
+GENERIC_TERMS = {"相当額", "合計額", "取得等", "取引等", "見込額", "種類等", "制限等", "氏名等"}
+
+
+def parse_keyword_line(line_str):
+    """
+    論点本文中の「キーワード: 内国法人、収益事業」形式の行を解析する。
+    キーワード行でなければ None を返す。
+    """
+    for prefix in ("キーワード:", "キーワード："):
+        if line_str.startswith(prefix):
+            body = line_str[len(prefix):]
+            return [k.strip() for k in re.split(r"[、,，/／]", body) if k.strip()]
+    return None
+
+
+def keyword_terms(text):
+    """本文から法令用語の候補となる漢字の連続を出現順に（重複なしで）返す"""
+    terms = []
+    for run in KEYWORD_PATTERN.findall(text):
+        run = RELATIONAL_SUFFIXES.sub("", run)
+        if len(run) < 3 or run.startswith(UNIT_PREFIXES) or run.endswith("的") or run in GENERIC_TERMS:
+            continue
+        terms.append(run)
+    return list(dict.fromkeys(terms))
+
+
+def extract_keywords(data, min_items=2):
+    """
+    各論点に keywords を設定したコーパスのコピーを返す（data 自体は変更しない）。
+    「キーワード:」行で明示された explicit_keywords があればそれを使い、
+    なければ複数の論点に現れる漢字の連続（3〜12文字）を法令用語として抽出する。
+    コーパス全体の出現数に依存するため、コーパスを組み直すたびに呼び出す。
+    """
+    item_terms = {}
+    term_counts = {}
+    for h1 in data:
+        for h2 in data[h1]:
+            for item in data[h1][h2]:
+                terms = keyword_terms(item["answer"])
+                item_terms[id(item)] = terms
+                for term in terms:
+                    term_counts[term] = term_counts.get(term, 0) + 1
+
+    result = {}
+    for h1 in data:
+        result[h1] = {}
+        for h2, items in data[h1].items():
+            result[h1][h2] = [
+                dict(item, keywords=list(item.get("explicit_keywords") or
+                                         [t for t in item_terms[id(item)] if term_counts[t] >= min_items]))
+                for item in items
+            ]
+    return result
+
+
+class KeywordMatcher:
+    """
+    コーパス全体のキーワードから Aho-Corasick オートマトンを構築し、
+    解答を1回走査するだけで含まれるキーワードをすべて検出する。
+    """
+
+    def __init__(self, keywords):
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [set()]
+        for keyword in keywords:
+            self._add(normalize_text(keyword))
+        self._build_failure_links()
+
+    @classmethod
+    def from_corpus(cls, data):
+        keywords = set()
+        for h1 in data:
+            for h2 in data[h1]:
+                for item in data[h1][h2]:
+                    keywords.update(item.get("keywords", []))
+        return cls(sorted(keywords))
+
+    def _add(self, keyword):
+        if not keyword:
+            return
+        state = 0
+        for ch in keyword:
+            if ch not in self._goto[state]:
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append(set())
+                self._goto[state][ch] = len(self._goto) - 1
+            state = self._goto[state][ch]
+        self._out[state].add(keyword)
+
+    def _build_failure_links(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                f = self._fail[state]
+                while f and ch not in self._goto[f]:
+                    f = self._fail[f]
+                self._fail[nxt] = self._goto[f].get(ch, 0)
+                # Inherit matches that end at the failure state (suffix keywords)
+                self._out[nxt] |= self._out[self._fail[nxt]]
+
+    def find_all(self, text):
+        """テキスト中に現れるキーワード（正規化済み）の集合を返す"""
+        found = set()
+        state = 0
+        for ch in normalize_text(text):
+            while state and ch not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(ch, 0)
+            if self._out[state]:
+                found |= self._out[state]
+        return found
+
+    def missing_keywords(self, item, text):
+        """論点のキーワードのうち、解答に含まれていないものを返す"""
+        found = self.find_all(text)
+        return [k for k in item.get("keywords", []) if normalize_text(k) not in found]
@@ -3,6 +3,10 @@ import os
 from datetime import datetime, timedelta
 
 LOG_FILE = "data/learning_log.json"
+# Seconds already imported per offline bundle and date, so re-importing a results file adds only the difference
+IMPORT_FILE = "data/learning_imports.json"
+# Per-item scores from offline bundles {bundle_id: {"h1": ..., "results": [...]}}
+RESULTS_FILE = "data/learning_results.json"
 
 class LearningManager:
     def __init__(self):
@@ -43,6 +47,53 @@ class LearningManager:
         # keeping it simple: just save
         self._save_log(log_data)
 
+    def import_offline_results(self, payload):
+        """
+        オフライン学習用バンドルから書き出した結果（JSON）を学習ログに取り込む。
+        同じバンドルの結果を何度取り込んでも、未取り込み分の学習時間だけを加算し、
+        論点ごとの採点結果は judged_at で重複を除いて RESULTS_FILE に保存する。
+        Returns:
+            (added_seconds, new_results)
+        """
+        bundle_id = payload.get("bundle_id")
+        if not bundle_id:
+            raise ValueError("bundle_id がありません。オフライン学習用ファイルから書き出した結果を指定してください。")
+
+        try:
+            with open(IMPORT_FILE, 'r') as f:
+                imports = json.load(f)
+        except:
+            imports = {}
+
+        imported = imports.setdefault(bundle_id, {})
+        log_data = self._load_log()
+        added = 0
+        for date_str, seconds in payload.get("study_seconds", {}).items():
+            datetime.strptime(date_str, '%Y-%m-%d')  # reject malformed dates
+            delta = seconds - imported.get(date_str, 0)
+            if delta > 0:
+                log_data[date_str] = log_data.get(date_str, 0) + delta
+                imported[date_str] = seconds
+                added += delta
+
+        try:
+            with open(RESULTS_FILE, 'r', encoding='utf-8') as f:
+                all_results = json.load(f)
+        except:
+            all_results = {}
+
+        bundle_results = all_results.setdefault(bundle_id, {"h1": payload.get("h1"), "results": []})
+        seen = {r.get("judged_at") for r in bundle_results["results"]}
+        new_results = [r for r in payload.get("results", []) if r.get("judged_at") not in seen]
+        bundle_results["results"].extend(new_results)
+
+        self._save_log(log_data)
+        with open(IMPORT_FILE, 'w') as f:
+            json.dump(imports, f)
+        with open(RESULTS_FILE, 'w', encoding='utf-8') as f:
+            json.dump(all_results, f, ensure_ascii=False)
+        return added, new_results
+
     def get_learning_time(self):
         """Returns a tuple (today_seconds, yesterday_seconds)"""
         log_data = self._load_log()
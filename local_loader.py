@@ -1,19 +1,80 @@
 import os
 import glob
+from keyword_matcher import parse_keyword_line, extract_keywords
+from search_index import SearchIndex
 
 class LocalLoader:
     def __init__(self, data_dir="data"):
         self.data_dir = data_dir
+        # Per-file parse results {file_path: {H1: {H2: [items]}}}, merged into the corpus
+        self.file_trees = {}
+        self.file_debug = {}
+        self.search_index = SearchIndex()
 
     def load_data(self):
         """
         Scans the data directory for .md files and parses them.
         Returns:
-            data: Nested dictionary {H1: {H2: [{"title": H3, "answer": text}]}}
+            data: Nested dictionary {H1: {H2: [{"title": H3, "answer": text, "explicit_keywords": [...], "keywords": [...]}]}}
             debug_info: Dictionary with stats
         """
-        data = {}
-        debug_info = {
+        self.file_trees = {}
+        self.file_debug = {}
+        self.search_index = SearchIndex()
+        
+        for file_path in self.list_files():
+            self.update_file(file_path)
+
+        return self.build_corpus()
+
+    def list_files(self):
+        # Sorted so that same-named H1/H2 across files merge in a stable order
+        return sorted(glob.glob(os.path.join(self.data_dir, "*.md")))
+
+    def update_file(self, file_path):
+        """
+        (Re)parses a single file and replaces its tree and search index entries.
+        A file that fails to parse is dropped from the corpus and its error recorded.
+        """
+        file_debug = self._new_debug_info()
+        try:
+            tree = self.load_file(file_path, file_debug)
+            file_debug["files_loaded"] = 1
+            self.file_trees[file_path] = tree
+            self.search_index.add_tree(tree, source=file_path)
+        except Exception as e:
+            file_debug["errors"].append(f"{os.path.basename(file_path)}: {str(e)}")
+            self.file_trees.pop(file_path, None)
+            self.search_index.remove_source(file_path)
+        self.file_debug[file_path] = file_debug
+
+    def remove_file(self, file_path):
+        self.file_trees.pop(file_path, None)
+        self.file_debug.pop(file_path, None)
+        self.search_index.remove_source(file_path)
+
+    def build_corpus(self):
+        """Merges the current per-file trees into the corpus and sums the per-file stats."""
+        # Merge in path order (as load_data does) so a file added or recovered by a hot
+        # reload lands where a cold load would put it
+        data = self.merge_trees(self.file_trees[path] for path in sorted(self.file_trees))
+
+        # Keywords are set on copies of the items and recomputed from the whole corpus on
+        # every build, so the cached per-file trees never carry stale extracted keywords
+        data = extract_keywords(data)
+
+        debug_info = self._new_debug_info()
+        for path in sorted(self.file_debug):
+            file_debug = self.file_debug[path]
+            for key in ("files_loaded", "h1_count", "h2_count", "h3_count"):
+                debug_info[key] += file_debug[key]
+            debug_info["errors"].extend(file_debug["errors"])
+
+        return data, debug_info
+
+    @staticmethod
+    def _new_debug_info():
+        return {
             "files_loaded": 0,
             "h1_count": 0,
             "h2_count": 0,
@@ -21,16 +82,25 @@ class LocalLoader:
             "errors": []
         }
 
-        md_files = glob.glob(os.path.join(self.data_dir, "*.md"))
-        
-        for file_path in md_files:
-            try:
-                self._parse_file(file_path, data, debug_info)
-                debug_info["files_loaded"] += 1
-            except Exception as e:
-                debug_info["errors"].append(f"{os.path.basename(file_path)}: {str(e)}")
+    def load_file(self, file_path, debug_info):
+        """Parses a single .md file into its own {H1: {H2: [items]}} tree."""
+        tree = {}
+        self._parse_file(file_path, tree, debug_info)
+        return tree
 
-        return data, debug_info
+    @staticmethod
+    def merge_trees(trees):
+        """
+        Merges per-file trees in order. Same-named H1/H2 across files are combined
+        by appending the later file's items.
+        """
+        data = {}
+        for tree in trees:
+            for h1, h2_dict in tree.items():
+                merged_h2 = data.setdefault(h1, {})
+                for h2, items in h2_dict.items():
+                    merged_h2.setdefault(h2, []).extend(items)
+        return data
 
     def _parse_file(self, file_path, data, debug_info):
         with open(file_path, 'r', encoding='utf-8') as f:
@@ -79,7 +149,8 @@ class LocalLoader:
                 current_h3 = line_str[4:].strip()
                 data[current_h1][current_h2].append({
                     "title": current_h3,
-                    "answer": ""
+                    "answer": "",
+                    "explicit_keywords": []
                 })
                 debug_info["h3_count"] += 1
 
@@ -89,11 +160,18 @@ class LocalLoader:
                     if not data[current_h1][current_h2] or data[current_h1][current_h2][-1]["title"] != "（全体）":
                         data[current_h1][current_h2].append({
                             "title": "（全体）",
-                            "answer": ""
+                            "answer": "",
+                            "explicit_keywords": []
                         })
                 
                 last_item = data[current_h1][current_h2][-1]
                 
+                # "キーワード: A、B" lines list key phrases and are not part of the answer
+                keywords = parse_keyword_line(line_str)
+                if keywords is not None:
+                    last_item["explicit_keywords"].extend(keywords)
+                    continue
+                
                 # Append line to answer
                 # If it's a completely empty line, only append if we already have content (avoid leading newlines)
                 if not line_str:
@@ -112,3 +190,4 @@ class LocalLoader:
             for h2 in data[h1]:
                 for item in data[h1][h2]:
                     item["answer"] = item["answer"].strip()
+
@@ -33,6 +33,11 @@ class MemoManager:
         key = f"{h1}|{h2}|{item_title}"
         return data.get(key, "")
 
+    def get_memos(self, h1, h2, item_titles):
+        """複数の論点のメモをファイルを1回だけ読んで取得する（{論点タイトル: メモ}）"""
+        data = self._load_all()
+        return {title: data.get(f"{h1}|{h2}|{title}", "") for title in item_titles}
+
     def save_memo(self, h1, h2, item_title, text):
         """特定の論点にメモを保存する"""
         data = self._load_all()
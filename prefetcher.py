@@ -0,0 +1,60 @@
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from scoring import normalize_answer, answer_clauses
+
+
+class SectionPrefetcher:
+    """
+    次の大項目（H2）の採点に必要なものをバックグラウンドで準備する。
+
+    正解の正規化・項目分割（scoring のキャッシュに載る）とメモの読み込みを
+    学習中の大項目を表示している間に済ませておき、次の大項目へ移動したときや
+    最初の判定時の待ち時間をなくす。全セッションで共有する。
+    """
+
+    def __init__(self, memo_manager, max_sections=8):
+        self.memo_manager = memo_manager
+        self.max_sections = max_sections
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="section-prefetch")
+        self._sections = OrderedDict()
+        self._lock = threading.Lock()
+
+    def prefetch(self, version, h1, h2, items):
+        """大項目の準備をバックグラウンドで開始する（準備済み・準備中なら何もしない）"""
+        self._submit((version, h1, h2), items)
+
+    def get_memos(self, version, h1, h2, items):
+        """
+        大項目のメモ {論点タイトル: メモ} を返す。
+        準備中なら完了を待ち、未着手ならこの場で準備する。
+        """
+        return self._submit((version, h1, h2), items).result()["memos"]
+
+    def invalidate(self, h1, h2):
+        """
+        メモ保存時に大項目の準備結果を破棄する。準備中の結果は保存前の memos.json を
+        読んでいる可能性があるため、書き換えずに破棄して次回読み直す。
+        """
+        with self._lock:
+            for key in [k for k in self._sections if k[1:] == (h1, h2)]:
+                del self._sections[key]
+
+    def _submit(self, key, items):
+        with self._lock:
+            future = self._sections.get(key)
+            if future is None:
+                future = self._executor.submit(self._build, key[1], key[2], items)
+                self._sections[key] = future
+                while len(self._sections) > self.max_sections:
+                    self._sections.popitem(last=False)
+            else:
+                self._sections.move_to_end(key)
+            return future
+
+    def _build(self, h1, h2, items):
+        for item in items:
+            normalize_answer(item["answer"])
+            answer_clauses(item["answer"])
+        memos = self.memo_manager.get_memos(h1, h2, [item["title"] for item in items])
+        return {"memos": memos}
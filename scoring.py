@@ -0,0 +1,173 @@
+import functools
+import unicodedata
+import Levenshtein
+
+
+def normalize_text(text):
+    if not text:
+        return ""
+    # NFKC normalization converts full-width numbers/parens to half-width
+    text = unicodedata.normalize('NFKC', text)
+    # Remove spaces (full-width and half-width) to ignore stylistic differences in spacing
+    return text.replace(" ", "").replace("　", "")
+
+
+@functools.lru_cache(maxsize=4096)
+def normalize_answer(text):
+    """正解テキスト用の normalize_text。正解は繰り返し採点されるため結果をキャッシュする"""
+    return normalize_text(text)
+
+
+def compute_similarity(text1, text2):
+    if not text1 or not text2:
+        return 0.0
+    # Normalize both texts before comparison (text2 is the correct answer)
+    text1_norm = normalize_text(text1)
+    text2_norm = normalize_answer(text2)
+    return Levenshtein.ratio(text1_norm, text2_norm) * 100
+
+
+# Circled numerals ①..⑳ and parenthesized numerals ⑴..⒇ at the start of a line begin
+# a new clause (inline ones such as "①にかかわらず" are cross-references).
+# Splitting must happen before NFKC, which folds them into plain digits.
+CLAUSE_MARKERS = {chr(c) for c in range(0x2460, 0x2474)} | {chr(c) for c in range(0x2474, 0x2488)}
+# 。 inside brackets, e.g. "（清算中のものを除く。）", does not end a clause
+OPEN_BRACKETS = "（(「『【"
+CLOSE_BRACKETS = "）)」』】"
+
+
+def split_clauses(text):
+    """正解・解答を括弧の外の「。」と行頭の丸数字で項目に分割し、正規化済みの項目リストを返す"""
+    clauses = []
+    current = []
+    depth = 0
+    for ch in text or "":
+        if ch == "\n":
+            # Unbalanced brackets in a typed answer should not swallow the rest of it
+            depth = 0
+        elif ch in OPEN_BRACKETS:
+            depth += 1
+        elif ch in CLOSE_BRACKETS:
+            depth = max(0, depth - 1)
+        if ch in CLAUSE_MARKERS and current and current[-1] == "\n":
+            clauses.append("".join(current))
+            current = []
+        current.append(ch)
+        if ch == "。" and depth == 0:
+            clauses.append("".join(current))
+            current = []
+    if current:
+        clauses.append("".join(current))
+
+    normalized = [normalize_text(c).strip() for c in clauses]
+    return [c for c in normalized if c]
+
+
+@functools.lru_cache(maxsize=4096)
+def answer_clauses(text):
+    """正解テキスト用の split_clauses（キャッシュ付き、タプルで返す）"""
+    return tuple(split_clauses(text))
+
+
+def banded_distance(a, b, band, max_dist=None):
+    """
+    Indel 距離を対角線から band 以内のセルだけで計算する。
+    真の距離の経路が帯の外に出る場合は上界を返す。計算量は O(len(a) * band)。
+    max_dist を指定すると、距離がそれを超えることが確定した時点で打ち切り len(a) + len(b) を返す。
+    """
+    n, m = len(a), len(b)
+    if abs(n - m) > band or (max_dist is not None and abs(n - m) > max_dist):
+        return n + m
+    inf = n + m + 1
+    prev = [j if j <= band else inf for j in range(m + 1)]
+    for i in range(1, n + 1):
+        lo = max(1, i - band)
+        hi = min(m, i + band)
+        row = [inf] * (m + 1)
+        if i <= band:
+            row[0] = i
+        ch = a[i - 1]
+        for j in range(lo, hi + 1):
+            if ch == b[j - 1]:
+                row[j] = prev[j - 1]
+            else:
+                row[j] = min(prev[j], row[j - 1]) + 1
+        # Early exit: every later cell is at least the current row minimum
+        if max_dist is not None and min(row[max(0, lo - 1):hi + 1]) > max_dist:
+            return n + m
+        prev = row
+    return min(prev[m], n + m)
+
+
+def _clause_distance(a, b):
+    # Band wide enough for typical omissions within one clause
+    band = abs(len(a) - len(b)) + max(8, max(len(a), len(b)) // 4)
+    return banded_distance(a, b, band)
+
+
+def compute_clause_scores(user_text, correct_text, clause_band=2):
+    """
+    正解と解答を項目単位で対応付けて採点する。
+
+    項目列どうしを対角線から clause_band（＋項目数の差）以内に限って整列し、
+    各対は banded_distance で比較する。対応する解答がない正解の項目は欠落、
+    対応しない解答の項目は余分として全文字数を距離に加える。
+
+    Returns:
+        {"total": 0〜100, "clauses": [{"correct": str, "user": str, "score": 0〜100}]}
+    """
+    correct = answer_clauses(correct_text)
+    user = split_clauses(user_text)
+    n, m = len(correct), len(user)
+    if not correct or not user:
+        return {
+            "total": 0.0,
+            "clauses": [{"correct": c, "user": "", "score": 0.0} for c in correct]
+        }
+
+    band = clause_band + abs(n - m)
+    inf = float("inf")
+    # cost[i][j]: minimal distance aligning correct[:i] with user[:j]
+    cost = [[inf] * (m + 1) for _ in range(n + 1)]
+    back = [[None] * (m + 1) for _ in range(n + 1)]
+    pair_dist = {}
+    cost[0][0] = 0
+    for i in range(n + 1):
+        for j in range(max(0, i - band), min(m, i + band) + 1):
+            if i == 0 and j == 0:
+                continue
+            best, move = inf, None
+            if i > 0 and cost[i - 1][j] + len(correct[i - 1]) < best:
+                best, move = cost[i - 1][j] + len(correct[i - 1]), "missing"
+            if j > 0 and cost[i][j - 1] + len(user[j - 1]) < best:
+                best, move = cost[i][j - 1] + len(user[j - 1]), "extra"
+            if i > 0 and j > 0 and cost[i - 1][j - 1] < inf:
+                d = _clause_distance(correct[i - 1], user[j - 1])
+                pair_dist[(i - 1, j - 1)] = d
+                if cost[i - 1][j - 1] + d < best:
+                    best, move = cost[i - 1][j - 1] + d, "match"
+            cost[i][j] = best
+            back[i][j] = move
+
+    # Trace back the alignment
+    clauses = []
+    i, j = n, m
+    while i > 0 or j > 0:
+        move = back[i][j]
+        if move == "match":
+            c, u = correct[i - 1], user[j - 1]
+            d = pair_dist[(i - 1, j - 1)]
+            clauses.append({"correct": c, "user": u, "score": (1 - d / (len(c) + len(u))) * 100})
+            i, j = i - 1, j - 1
+        elif move == "missing":
+            clauses.append({"correct": correct[i - 1], "user": "", "score": 0.0})
+            i -= 1
+        else:
+            j -= 1
+    clauses.reverse()
+
+    total_len = sum(len(c) for c in correct) + sum(len(u) for u in user)
+    return {
+        "total": (1 - cost[n][m] / total_len) * 100,
+        "clauses": clauses
+    }
@@ -0,0 +1,126 @@
+import threading
+from collections import Counter
+from scoring import normalize_text
+
+
+def _grams(text):
+    """文字 unigram と bigram を出現回数つきで返す"""
+    counts = Counter(text)
+    counts.update(text[i:i + 2] for i in range(len(text) - 1))
+    return counts
+
+
+class SearchIndex:
+    """
+    論点タイトルと本文に対する文字 bigram の転置インデックス。
+    ファイル単位で登録・削除できるため、1ファイルの変更時は差分だけ更新する。
+    ファイル監視スレッドからの更新と検索が並行するため、操作はロックで保護する。
+    """
+
+    TITLE_WEIGHT = 3
+
+    def __init__(self):
+        self._docs = {}
+        # gram -> {doc_id: (title_tf, body_tf)}
+        self._postings = {}
+        self._by_source = {}
+        self._next_id = 0
+        self._lock = threading.RLock()
+
+    def add_tree(self, tree, source):
+        """{H1: {H2: [items]}} のツリーを source（ファイルパス）に紐づけて登録する"""
+        with self._lock:
+            self.remove_source(source)
+            doc_ids = []
+            for h1, h2_dict in tree.items():
+                for h2, items in h2_dict.items():
+                    for item in items:
+                        doc_ids.append(self._add_doc(h1, h2, item))
+            self._by_source[source] = doc_ids
+
+    def remove_source(self, source):
+        with self._lock:
+            for doc_id in self._by_source.pop(source, []):
+                doc = self._docs.pop(doc_id)
+                for gram in set(_grams(doc["title_norm"])) | set(_grams(doc["answer_norm"])):
+                    postings = self._postings.get(gram)
+                    if postings is not None:
+                        postings.pop(doc_id, None)
+                        if not postings:
+                            del self._postings[gram]
+
+    def _add_doc(self, h1, h2, item):
+        title_norm = normalize_text(item["title"])
+        answer_norm = normalize_text(item["answer"])
+        title_grams = _grams(title_norm)
+        body_grams = _grams(answer_norm)
+
+        doc_id = self._next_id
+        self._next_id += 1
+        self._docs[doc_id] = {
+            "h1": h1,
+            "h2": h2,
+            "title": item["title"],
+            "answer": item["answer"],
+            "title_norm": title_norm,
+            "answer_norm": answer_norm
+        }
+
+        postings = self._postings
+        for gram, body_tf in body_grams.items():
+            postings.setdefault(gram, {})[doc_id] = (title_grams.get(gram, 0), body_tf)
+        for gram, title_tf in title_grams.items():
+            if gram not in body_grams:
+                postings.setdefault(gram, {})[doc_id] = (title_tf, 0)
+        return doc_id
+
+    def search(self, query, limit=20):
+        """
+        クエリの bigram を含む論点を関連度順に返す。
+        Returns:
+            [{"h1", "h2", "title", "snippet", "score"}]
+        """
+        query_norm = normalize_text(query)
+        if not query_norm:
+            return []
+        if len(query_norm) == 1:
+            query_grams = [query_norm]
+        else:
+            query_grams = list(dict.fromkeys(query_norm[i:i + 2] for i in range(len(query_norm) - 1)))
+
+        with self._lock:
+            scores = {}
+            for gram in query_grams:
+                for doc_id, (title_tf, body_tf) in self._postings.get(gram, {}).items():
+                    score = self.TITLE_WEIGHT * min(title_tf, 1) + min(body_tf, 3) / 3
+                    scores[doc_id] = scores.get(doc_id, 0) + score
+
+            for doc_id in scores:
+                doc = self._docs[doc_id]
+                # Exact phrase matches rank above items that only share some bigrams
+                if query_norm in doc["title_norm"]:
+                    scores[doc_id] += 10
+                if query_norm in doc["answer_norm"]:
+                    scores[doc_id] += 5
+
+            ranked = sorted(scores.items(), key=lambda kv: -kv[1])[:limit]
+            return [
+                {
+                    "h1": self._docs[doc_id]["h1"],
+                    "h2": self._docs[doc_id]["h2"],
+                    "title": self._docs[doc_id]["title"],
+                    "snippet": self._snippet(self._docs[doc_id]["answer_norm"], query_norm),
+                    "score": score
+                }
+                for doc_id, score in ranked
+            ]
+
+    @staticmethod
+    def _snippet(text, query, width=40):
+        text = text.replace("\n", " ")
+        pos = text.find(query)
+        if pos < 0:
+            return text[:width] + ("…" if len(text) > width else "")
+        start = max(0, pos - width // 2)
+        end = min(len(text), pos + len(query) + width // 2)
+        return ("…" if start > 0 else "") + text[start:end] + ("…" if end < len(text) else "")
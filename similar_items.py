@@ -0,0 +1,117 @@
+"""
+紛らわしい論点（本文がほぼ同じ論点の組）をコーパス全体から検出するオフライン分析。
+
+    python similar_items.py
+
+本文の文字 3-gram 集合から MinHash シグネチャを作り、LSH（バンド分割）で
+候補の組だけを取り出してから Jaccard 係数で確認する。全組み合わせの比較を避けるため、
+論点数が数万件になっても実行時間はほぼ線形に収まる。
+"""
+import json
+import os
+import random
+import zlib
+from scoring import normalize_text
+
+CONFUSABLES_FILE = "data/confusables.json"
+
+SHINGLE_SIZE = 3
+NUM_PERM = 128
+BANDS = 32  # 32 bands x 4 rows: pairs at 0.5 Jaccard become candidates with ~87% probability
+MERSENNE_PRIME = (1 << 61) - 1
+MAX_HASH = (1 << 32) - 1
+
+
+def item_key(h1, h2, title):
+    # MemoManager と同じ "H1名|H2名|論点タイトル" 形式
+    return f"{h1}|{h2}|{title}"
+
+
+def shingles(text):
+    text = normalize_text(text).replace("\n", "")
+    return {text[i:i + SHINGLE_SIZE] for i in range(len(text) - SHINGLE_SIZE + 1)}
+
+
+class MinHasher:
+    def __init__(self, num_perm=NUM_PERM, seed=1):
+        rng = random.Random(seed)
+        self.params = [(rng.randrange(1, MERSENNE_PRIME), rng.randrange(0, MERSENNE_PRIME)) for _ in range(num_perm)]
+
+    def signature(self, shingle_set):
+        # crc32 keeps hashes stable across runs (built-in hash() is salted per process)
+        hashes = [zlib.crc32(s.encode("utf-8")) for s in shingle_set]
+        return [
+            min(((a * h + b) % MERSENNE_PRIME) & MAX_HASH for h in hashes)
+            for a, b in self.params
+        ]
+
+
+def find_confusables(data, threshold=0.5, bands=BANDS):
+    """
+    本文の Jaccard 係数が threshold 以上の論点の組を返す。
+    Returns:
+        [{"a": item, "b": item, "similarity": float}]  (item = {"h1", "h2", "title"})
+    """
+    hasher = MinHasher()
+    rows = len(hasher.params) // bands
+
+    entries = []
+    for h1 in data:
+        for h2 in data[h1]:
+            for item in data[h1][h2]:
+                shingle_set = shingles(item["answer"])
+                if shingle_set:
+                    entries.append(({"h1": h1, "h2": h2, "title": item["title"]}, shingle_set))
+
+    buckets = {}
+    for idx, (_, shingle_set) in enumerate(entries):
+        sig = hasher.signature(shingle_set)
+        for band in range(bands):
+            band_key = (band, tuple(sig[band * rows:(band + 1) * rows]))
+            buckets.setdefault(band_key, []).append(idx)
+
+    candidates = set()
+    for members in buckets.values():
+        for i in range(len(members)):
+            for j in range(i + 1, len(members)):
+                candidates.add((members[i], members[j]))
+
+    pairs = []
+    for i, j in sorted(candidates):
+        a_set, b_set = entries[i][1], entries[j][1]
+        similarity = len(a_set & b_set) / len(a_set | b_set)
+        if similarity >= threshold:
+            pairs.append({"a": entries[i][0], "b": entries[j][0], "similarity": similarity})
+
+    pairs.sort(key=lambda p: -p["similarity"])
+    return pairs
+
+
+def build_confusable_map(pairs):
+    """論点キーごとに紛らわしい論点のリストを作る"""
+    result = {}
+    for pair in pairs:
+        for src, dst in ((pair["a"], pair["b"]), (pair["b"], pair["a"])):
+            key = item_key(src["h1"], src["h2"], src["title"])
+            result.setdefault(key, []).append(dict(dst, similarity=round(pair["similarity"], 3)))
+    return result
+
+
+def load_confusables(path=CONFUSABLES_FILE):
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except Exception:
+        return {}
+
+
+if __name__ == "__main__":
+    from local_loader import LocalLoader
+
+    data, debug_info = LocalLoader().load_data()
+    pairs = find_confusables(data)
+    with open(CONFUSABLES_FILE, 'w', encoding='utf-8') as f:
+        json.dump(build_confusable_map(pairs), f, ensure_ascii=False, indent=2)
+    print(f"{len(pairs)} pairs written to {CONFUSABLES_FILE}")
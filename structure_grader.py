@@ -0,0 +1,138 @@
+import re
+from bisect import bisect_left
+from scoring import normalize_text, banded_distance
+
+# Leading bullets / heading marks and numbering such as "1." "(1)" "①" (NFKC folds ① to 1)
+PREFIX_PATTERN = re.compile(r"^[#\-\*・•]*\s*(\(\d+\)|\d+[\.\)、]|[a-zA-Zｱ-ﾝア-ン][\.\)])?")
+# Pseudo items created for body text without an H3 heading
+PSEUDO_TITLES = ("（全体）", "（前文）")
+
+
+def clean_title(text):
+    """見出し・想起した行から記号や番号を取り除き、比較用の文字列にする"""
+    text = normalize_text(text).replace("☆", "").strip()
+    return PREFIX_PATTERN.sub("", text, count=1).strip()
+
+
+class FuzzyTitleIndex:
+    """
+    タイトルを文字数ごとのバケットに分けた曖昧検索インデックス。
+
+    一致率（Indel 距離による Levenshtein.ratio）が threshold 以上になり得るのは
+    文字数の比が一定範囲に収まるタイトルだけなので、そのバケットだけを調べ、
+    各比較も許容距離を超えた時点で打ち切る。
+    """
+
+    def __init__(self, titles):
+        self.titles = titles
+        self._exact = {}
+        self._buckets = {}
+        for idx, title in enumerate(titles):
+            self._exact.setdefault(title, []).append(idx)
+            self._buckets.setdefault(len(title), []).append(idx)
+        self._lengths = sorted(self._buckets)
+
+    def match(self, query, threshold=0.75):
+        """一致率が threshold 以上のタイトルを [(idx, ratio)] で返す"""
+        if not query:
+            return []
+        if query in self._exact:
+            return [(idx, 1.0) for idx in self._exact[query]]
+
+        n = len(query)
+        # ratio >= t requires len(title) in [n*t/(2-t), n*(2-t)/t]
+        lo = n * threshold / (2 - threshold)
+        hi = n * (2 - threshold) / threshold
+        matches = []
+        for length in self._lengths[bisect_left(self._lengths, lo):]:
+            if length > hi:
+                break
+            max_dist = int((1 - threshold) * (n + length))
+            for idx in self._buckets[length]:
+                dist = banded_distance(query, self.titles[idx], max_dist, max_dist=max_dist)
+                if dist <= max_dist:
+                    matches.append((idx, 1 - dist / (n + length)))
+        return matches
+
+
+class StructureGrader:
+    """テーマ（H1）の構成ツリーと、想起して書き出した構成を照合する"""
+
+    def __init__(self, h2_dict):
+        # Expected outline in document order: H2 followed by its H3 items
+        self.entries = []
+        for h2, items in h2_dict.items():
+            self.entries.append({"level": 2, "h2": h2, "title": h2})
+            for item in items:
+                if item["title"] not in PSEUDO_TITLES:
+                    self.entries.append({"level": 3, "h2": h2, "title": item["title"]})
+        self.index = FuzzyTitleIndex([clean_title(e["title"]) for e in self.entries])
+
+    def grade(self, outline_text, threshold=0.75):
+        """
+        Returns:
+            {"recall", "precision", "matches": [(line, entry)], "missing": [entry],
+             "unmatched_lines": [line], "order_errors": [(line, entry)]}
+        """
+        lines = [line.strip() for line in (outline_text or "").splitlines() if line.strip()]
+        matched = {}
+        matches = []
+        unmatched_lines = []
+        last_idx = -1
+        current_h2 = None
+        for line in lines:
+            candidates = [(idx, r) for idx, r in self.index.match(clean_title(line), threshold) if idx not in matched]
+            if not candidates:
+                unmatched_lines.append(line)
+                continue
+            # The same H3 title (e.g. 内国法人) recurs under several H2s: an H3 line belongs to
+            # the H2 written above it. Fall back to every H2 only if that section has no match.
+            in_section = [
+                (idx, r) for idx, r in candidates
+                if self.entries[idx]["level"] == 2 or self.entries[idx]["h2"] == current_h2
+            ]
+            if current_h2 is not None and in_section:
+                candidates = in_section
+            # Best ratio first; among ties prefer the next title in document order
+            idx, _ = max(candidates, key=lambda c: (c[1], c[0] > last_idx, -c[0]))
+            matched[idx] = line
+            matches.append((line, idx))
+            last_idx = idx
+            current_h2 = self.entries[idx]["h2"]
+
+        order_errors = [
+            (matches[k][0], self.entries[matches[k][1]])
+            for k in self._out_of_order([idx for _, idx in matches])
+        ]
+
+        return {
+            "recall": len(matched) / len(self.entries) if self.entries else 0.0,
+            "precision": len(matches) / len(lines) if lines else 0.0,
+            "matches": [(line, self.entries[idx]) for line, idx in matches],
+            "missing": [e for idx, e in enumerate(self.entries) if idx not in matched],
+            "unmatched_lines": unmatched_lines,
+            "order_errors": order_errors
+        }
+
+    @staticmethod
+    def _out_of_order(sequence):
+        """最長増加部分列に含まれない位置（順序が前後している行）を返す"""
+        tails = []
+        tail_pos = []
+        prev = [-1] * len(sequence)
+        for pos, value in enumerate(sequence):
+            k = bisect_left(tails, value)
+            if k == len(tails):
+                tails.append(value)
+                tail_pos.append(pos)
+            else:
+                tails[k] = value
+                tail_pos[k] = pos
+            prev[pos] = tail_pos[k - 1] if k > 0 else -1
+
+        in_order = set()
+        pos = tail_pos[-1] if tail_pos else -1
+        while pos >= 0:
+            in_order.add(pos)
+            pos = prev[pos]
+        return [pos for pos in range(len(sequence)) if pos not in in_order]